@@ -0,0 +1,150 @@
+import os
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+import scipy.stats as stats
+import generate_report as report
+
+
+def synthetic_flights(n_flights=50000, n_airlines=40, seed=0):
+    """Builds a raw flight dataset in the same format as aviation_data.csv."""
+    rng = np.random.default_rng(seed)
+    airlines = np.array([f"Airline {i:02d}" for i in range(n_airlines)])
+    hours = rng.integers(6, 20, n_flights)
+    minutes = rng.integers(0, 60, n_flights)
+    duration = rng.integers(60, 240, n_flights)
+    departure = pd.Timestamp("2023-09-01") + pd.to_timedelta(
+        rng.integers(0, 30, n_flights), unit="D") + pd.to_timedelta(
+        hours * 60 + minutes, unit="m")
+    arrival = departure + pd.to_timedelta(duration, unit="m")
+
+    return pd.DataFrame({
+        "FlightNumber": [f"FN{i:06d}" for i in range(n_flights)],
+        "DepartureDate": departure.strftime("%m/%d/%Y"),
+        "DepartureTime": departure.strftime("%I:%M %p"),
+        "ArrivalDate": arrival.strftime("%m/%d/%Y"),
+        "ArrivalTime": arrival.strftime("%I:%M %p"),
+        "Airline": airlines[rng.integers(0, n_airlines, n_flights)],
+        "DelayMinutes": rng.exponential(15, n_flights).round(),
+    })
+
+
+def clean_flights(df):
+    """Runs the cleaning stages (without MySQL) once, outside the timings."""
+    messages = []
+    df = report.check_missing_values(df.copy(), messages)
+    df = report.check_duplicates(df, messages)
+    df = report.check_inconsistent_time_entries(df, messages)
+    return report.normalize_data(df, messages)
+
+
+def check_false_alarm_rate(n_flights=60000, n_airlines=20, n_days=30,
+                           seed=0):
+    """Checks that stationary delays raise roughly the nominal alert rate."""
+    rng = np.random.default_rng(seed)
+    days = pd.date_range("2023-09-01", periods=n_days).strftime("%Y-%m-%d")
+    df = pd.DataFrame({
+        "FlightNumber": [f"FN{i:06d}" for i in range(n_flights)],
+        "Airline": [f"Airline {i:02d}"
+                    for i in rng.integers(0, n_airlines, n_flights)],
+        "DepartureDate": days[rng.integers(0, n_days, n_flights)],
+        "DepartureTime": [f"{hour:02d}:00"
+                          for hour in rng.integers(6, 20, n_flights)],
+        "DelayMinutes": rng.normal(20, 5, n_flights),
+    })
+
+    state = report.new_delay_state()
+    report.add_airlines(state, df["Airline"])
+    scored_cells = scored_flights = shifts = anomalies = 0
+    for _, batch in df.groupby("DepartureDate", sort=True):
+        ready = ((state["batches"] >= report.MIN_BATCHES)
+                 & (state["count"] >= report.MIN_HISTORY))
+        batch_count, _ = report.delay_totals(batch, state["airlines"])
+        scored_cells += int((ready & (batch_count > 0)).sum())
+        scored_flights += int(batch_count[ready].sum())
+        batch_shifts, batch_anomalies = report.update_delay_state(state, batch)
+        shifts += len(batch_shifts)
+        anomalies += len(batch_anomalies)
+
+    nominal = 2 * stats.norm.sf(report.Z_THRESHOLD)
+    shift_rate = shifts / scored_cells
+    anomaly_rate = anomalies / scored_flights
+    print(f"False alarm rate on stationary delays: shifts {shift_rate:.4f}, "
+          f"flights {anomaly_rate:.4f} (nominal {nominal:.4f})")
+    assert shift_rate < 2 * nominal, "Too many false delay shifts"
+    assert anomaly_rate < 2 * nominal, "Too many false anomalous flights"
+
+
+def timed(function, timings):
+    """Wraps a function so the time spent in each call is recorded."""
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            timings.append(time.perf_counter() - start)
+    return wrapper
+
+
+def build_report(df, mode):
+    """Builds the report and returns its size and rendering time.
+
+    Only table and figure emission and generate_report are timed, and the
+    detector starts from a fresh state so both modes render the same content.
+    """
+    saved = {name: getattr(report, name) for name in (
+        "REPORT_MODE", "DELAY_STATE_PATH", "add_table", "save_figure",
+        "generate_report")}
+    timings = []
+    try:
+        report.REPORT_MODE = mode
+        report.DELAY_STATE_PATH = None
+        for name in ("add_table", "save_figure", "generate_report"):
+            setattr(report, name, timed(saved[name], timings))
+
+        messages = []
+        report.add_table(df.head(), messages)
+        state, shifts = report.detect_delay_anomalies(
+            df, messages, state=report.new_delay_state())
+        anova_result = report.data_analysis(df, messages)
+        report.key_stats(state, shifts, anova_result, messages)
+        size_kb = report.generate_report(
+            messages, path=f"reports/aviation_report_{mode}.html")
+    finally:
+        for name, value in saved.items():
+            setattr(report, name, value)
+    return size_kb, sum(timings)
+
+
+def main():
+    check_false_alarm_rate()
+    df = clean_flights(synthetic_flights())
+
+    results = []
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as workdir:
+        try:
+            os.chdir(workdir)
+            os.makedirs("reports")
+            for mode in ("standard", "compact"):
+                size_kb, seconds = build_report(df, mode)
+                # Standard mode references separate PNG files
+                assets_kb = sum(
+                    os.path.getsize(os.path.join("reports", name))
+                    for name in os.listdir("reports") if name.endswith(".png")
+                ) / 1024 if mode == "standard" else 0.0
+                results.append({
+                    "Mode": mode,
+                    "ReportKB": round(size_kb, 1),
+                    "AssetsKB": round(assets_kb, 1),
+                    "RenderSeconds": round(seconds, 2),
+                })
+        finally:
+            os.chdir(cwd)
+
+    print(pd.DataFrame(results).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
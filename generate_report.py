@@ -1,5 +1,13 @@
 from sqlalchemy import create_engine, text
+from concurrent.futures import ThreadPoolExecutor
+import base64
+import glob
+import importlib
+import io
 import os
+import re
+import time
+import numpy as np
 import pandas as pd
 from dotenv import load_dotenv
 import matplotlib.pyplot as plt
@@ -18,9 +26,118 @@ DB_HOST = os.getenv("DB_HOST")
 DB_NAME = os.getenv("DB_NAME")
 DB_PORT = os.getenv("DB_PORT")
 
-
-def read_data_csv():
-    df = pd.read_csv("aviation_data.csv")
+# Input files: a single CSV, a glob pattern (e.g. "feed/*/*.csv.gz") or a
+# manifest (.txt) listing one file per line. Compression is inferred from
+# the file extension (.gz, .zst, .bz2, .xz, .zip).
+DATA_SOURCE = os.getenv("DATA_SOURCE", "aviation_data.csv")
+# "c" (default pandas parser) or "pyarrow" (multithreaded Arrow CSV reader)
+CSV_ENGINE = os.getenv("CSV_ENGINE", "c")
+
+# Explicit dtypes so every file parses to the same schema without inference
+CSV_DTYPES = {
+    "FlightNumber": str,
+    "DepartureDate": str,
+    "DepartureTime": str,
+    "ArrivalDate": str,
+    "ArrivalTime": str,
+    "Airline": str,
+    "DelayMinutes": "float64",
+}
+
+# "standard" writes PNG files next to the report and inlines every table.
+# "compact" produces a single self-contained file: figures are embedded as
+# SVG/WebP and tables are stored as JSON, rendered only when a section is opened.
+REPORT_MODE = os.getenv("REPORT_MODE", "standard")
+# "auto" embeds line/bar charts as SVG and point-heavy charts as WebP;
+# "svg", "webp" or "png" force one format for every figure.
+FIGURE_FORMAT = os.getenv("FIGURE_FORMAT", "auto")
+FIGURE_DPI = int(os.getenv("FIGURE_DPI", "100"))
+MIN_FIGURE_DPI = 50
+REPORT_SIZE_BUDGET_KB = int(os.getenv("REPORT_SIZE_BUDGET_KB", "512"))
+# Rows kept per lazily loaded table in compact mode
+TABLE_ROW_LIMIT = int(os.getenv("TABLE_ROW_LIMIT", "500"))
+REPORT_PATH = "reports/aviation_report.html"
+
+
+def resolve_data_files(source):
+    """Expands a file path, glob pattern or manifest into a list of files."""
+    if source.endswith(".txt"):
+        base_dir = os.path.dirname(source)
+        with open(source) as manifest:
+            files = [
+                os.path.join(base_dir, line.strip())
+                for line in manifest
+                if line.strip() and not line.strip().startswith("#")
+            ]
+    else:
+        files = sorted(glob.glob(source))
+
+    if not files:
+        raise FileNotFoundError(f"No data files found for: {source}")
+    return files
+
+
+def read_single_csv(path, engine):
+    """Reads (and decompresses) one CSV file and records its throughput."""
+    start = time.perf_counter()
+    df = pd.read_csv(path, dtype=CSV_DTYPES, engine=engine,
+                     compression="infer")
+    elapsed = max(time.perf_counter() - start, 1e-9)
+
+    size_mb = os.path.getsize(path) / (1024 * 1024)
+    file_stats = {
+        "File": path,
+        "Rows": df.shape[0],
+        "SizeMB": round(size_mb, 3),
+        "Seconds": round(elapsed, 4),
+        "MBPerSecond": round(size_mb / elapsed, 2),
+        "RowsPerSecond": int(df.shape[0] / elapsed),
+    }
+    return df, file_stats
+
+
+def check_optional_dependencies(files, engine):
+    """Fails early with a clear message if an optional reader is missing."""
+    required = []
+    if engine == "pyarrow":
+        required.append(("pyarrow", "CSV_ENGINE='pyarrow'"))
+    if any(path.endswith(".zst") for path in files):
+        required.append(("zstandard", "reading .zst files"))
+
+    for module, feature in required:
+        try:
+            importlib.import_module(module)
+        except ImportError:
+            raise ImportError(
+                f"{feature} requires the optional '{module}' package. "
+                f"Install it with: pip install {module}")
+
+
+def read_data_csv(source=DATA_SOURCE, engine=CSV_ENGINE, max_workers=None,
+                  messages=None):
+    files = resolve_data_files(source)
+    check_optional_dependencies(files, engine)
+
+    # Decompression and parsing release the GIL, so a thread pool is enough
+    # to read the daily files concurrently.
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        results = list(executor.map(
+            lambda path: read_single_csv(path, engine), files))
+
+    frames = [df for df, _ in results]
+    throughput = pd.DataFrame([file_stats for _, file_stats in results])
+
+    if len(frames) == 1:
+        df = frames[0]
+    else:
+        df = pd.concat(frames, ignore_index=True)
+
+    print(throughput.to_string(index=False))
+    if messages is not None:
+        messages.append(
+            f"<p> Read {len(files)} file(s) using the '{engine}' engine. </p>")
+        messages.append("<h3>Read Throughput per File:</h3>")
+        add_table(throughput, messages, index=False)
     return df
 
 
@@ -34,7 +151,7 @@ def check_missing_values(df, messages):
     # Missing values before handling
     missing_before = df.isnull().sum()
     messages.append("<h3>Missing Values Before Handling:</h3>")
-    messages.append(missing_before.to_frame().to_html())
+    add_table(missing_before.to_frame(), messages)
 
     # Handle missing values for 'DelayMinutes'
     df["DelayMinutes"] = df["DelayMinutes"].fillna(0)
@@ -42,7 +159,7 @@ def check_missing_values(df, messages):
     # Missing values after handling
     missing_after = df.isnull().sum()
     messages.append("<h3>Missing Values After Handling:</h3>")
-    messages.append(missing_after.to_frame().to_html())
+    add_table(missing_after.to_frame(), messages)
     messages.append("<br/><hr>")
     return df
 
@@ -170,6 +287,285 @@ def normalize_data(df, messages):
     return df
 
 
+# Delay anomaly detection
+# State is kept per (Airline, DepartureHour) cell in compact (airlines x 24)
+# arrays so each new batch is scored and folded in without rescanning history.
+DELAY_STATE_PATH = os.getenv("DELAY_STATE_PATH")
+EWMA_ALPHA = 0.2
+Z_THRESHOLD = 3.0
+# A cell is only scored once its baseline is built from this many batches
+# (departure days) and flights
+MIN_BATCHES = 5
+MIN_HISTORY = 5
+MIN_SCALE = 1.0
+HOURS = 24
+# Largest shifts and flights (by |z|) listed in the report
+MAX_ALERTS = 20
+STATE_ARRAYS = {
+    "count": np.int32,      # flights seen
+    "batches": np.int32,    # batches seen
+    "total": np.float64,    # sum of delays
+    "sumsq": np.float64,    # sum of squared delays
+    "mean": np.float32,     # baseline delay
+    "var": np.float32,      # pooled per-flight delay variance
+    "mean_var": np.float32,  # variance of the baseline itself
+}
+SHIFT_COLUMNS = ["DepartureDate", "Airline", "DepartureHour", "Flights",
+                 "BatchMeanDelay", "BaselineDelay", "ZScore"]
+ANOMALY_COLUMNS = ["FlightNumber", "Airline", "DepartureDate",
+                   "DepartureTime", "DelayMinutes", "ZScore"]
+
+
+def new_delay_state():
+    """Creates an empty detector state."""
+    state = {key: np.zeros((0, HOURS), dtype=dtype)
+             for key, dtype in STATE_ARRAYS.items()}
+    state["airlines"] = []
+    # Last DepartureDate folded into the state; earlier days are skipped
+    state["last_date"] = ""
+    return state
+
+
+def load_delay_state(path=None):
+    """Loads the detector state saved by a previous run, if any."""
+    if path is None:
+        path = DELAY_STATE_PATH
+    if not path or not os.path.exists(path):
+        return new_delay_state()
+
+    with np.load(path) as saved:
+        state = {key: saved[key] for key in STATE_ARRAYS}
+        state["airlines"] = saved["airlines"].tolist()
+        state["last_date"] = str(saved["last_date"])
+    return state
+
+
+def save_delay_state(state, path=None):
+    """Saves the detector state so the next batch continues from it."""
+    if path is None:
+        path = DELAY_STATE_PATH
+    if not path:
+        return
+
+    state_dir = os.path.dirname(path)
+    if state_dir and not os.path.exists(state_dir):
+        os.makedirs(state_dir)
+
+    np.savez_compressed(
+        path,
+        airlines=np.array(state["airlines"], dtype=str),
+        last_date=np.array(state["last_date"]),
+        **{key: state[key] for key in STATE_ARRAYS},
+    )
+
+
+def add_airlines(state, airlines):
+    """Adds a row of state for every airline not seen before."""
+    new_airlines = [a for a in pd.unique(airlines)
+                    if a not in state["airlines"]]
+    if not new_airlines:
+        return
+
+    state["airlines"].extend(new_airlines)
+    for key in STATE_ARRAYS:
+        extra = np.zeros((len(new_airlines), HOURS), dtype=state[key].dtype)
+        state[key] = np.vstack([state[key], extra])
+
+
+def delay_cells(df, airlines):
+    """Maps each flight to its flat (Airline, DepartureHour) cell index."""
+    airline_index = {airline: i for i, airline in enumerate(airlines)}
+    airline_ids = df["Airline"].map(airline_index).to_numpy(dtype=np.int64)
+    hours = df["DepartureTime"].str[:2].astype(int).to_numpy()
+    return airline_ids * HOURS + hours
+
+
+def delay_totals(df, airlines):
+    """Counts flights and sums delays per (Airline, DepartureHour) cell."""
+    cells = delay_cells(df, airlines)
+    delays = df["DelayMinutes"].to_numpy(dtype=np.float64)
+    shape = (len(airlines), HOURS)
+    size = shape[0] * shape[1]
+    count = np.bincount(cells, minlength=size).reshape(shape)
+    total = np.bincount(cells, weights=delays, minlength=size).reshape(shape)
+    return count, total
+
+
+def update_delay_state(state, df):
+    """Scores a batch against the current state, then folds it in.
+
+    Returns the (Airline, DepartureHour) cells whose batch mean delay shifted
+    away from the EWMA baseline, and the individual anomalous flights.
+    """
+    add_airlines(state, df["Airline"])
+    cells = delay_cells(df, state["airlines"])
+    delays = df["DelayMinutes"].to_numpy(dtype=np.float64)
+    shape = state["count"].shape
+    size = state["count"].size
+
+    count, batches = state["count"], state["batches"]
+    mean, var, mean_var = state["mean"], state["var"], state["mean_var"]
+    batch_count, batch_total = delay_totals(df, state["airlines"])
+    seen = batch_count > 0
+    batch_mean = np.divide(batch_total, batch_count,
+                           out=np.zeros(shape), where=seen)
+
+    # z-scores against the baseline from previous batches. The standard
+    # error covers both the batch mean and the uncertainty of the baseline,
+    # and the variance is widened by df / (df - 2) as it is itself estimated
+    # from a limited number of flights.
+    dof = np.maximum(count - 1, 3)
+    flight_var = np.maximum(var, MIN_SCALE ** 2) * dof / (dof - 2)
+    standard_error = np.sqrt(
+        flight_var / np.maximum(batch_count, 1) + mean_var)
+    ready = (batches >= MIN_BATCHES) & (count >= MIN_HISTORY)
+    cell_z = np.where(ready & seen, (batch_mean - mean) / standard_error, 0.0)
+    flight_scale = np.sqrt(flight_var + mean_var)
+    flight_z = (delays - mean.flat[cells]) / flight_scale.flat[cells]
+    flight_z = np.where(ready.flat[cells], flight_z, 0.0)
+
+    rows, cols = np.nonzero(np.abs(cell_z) >= Z_THRESHOLD)
+    shifts = pd.DataFrame({
+        "Airline": [state["airlines"][i] for i in rows],
+        "DepartureHour": cols,
+        "Flights": batch_count[rows, cols],
+        "BatchMeanDelay": batch_mean[rows, cols].round(1),
+        "BaselineDelay": mean[rows, cols].astype(np.float64).round(1),
+        "ZScore": cell_z[rows, cols].round(2),
+    })
+    flagged = np.abs(flight_z) >= Z_THRESHOLD
+    anomalies = df.loc[flagged, ANOMALY_COLUMNS[:-1]].copy()
+    anomalies["ZScore"] = flight_z[flagged].round(2)
+
+    # Fold the batch in. The per-flight variance is pooled over every flight
+    # seen so far, which keeps the scale stable for small batches. Until a
+    # cell has MIN_BATCHES batches its baseline is the pooled mean; after
+    # that each batch is weighted by EWMA_ALPHA regardless of its size.
+    new_count = count + batch_count.astype(np.int32)
+    new_total = state["total"] + batch_total
+    new_sumsq = state["sumsq"] + np.bincount(
+        cells, weights=delays ** 2, minlength=size).reshape(shape)
+    new_batches = batches + seen.astype(np.int32)
+
+    pooled_mean = new_total / np.maximum(new_count, 1)
+    pooled_var = np.maximum(
+        new_sumsq - new_total * pooled_mean, 0) / np.maximum(new_count - 1, 1)
+    pooled_mean_var = pooled_var / np.maximum(new_count, 1)
+
+    ewma_mean = (1 - EWMA_ALPHA) * mean + EWMA_ALPHA * batch_mean
+    ewma_mean_var = ((1 - EWMA_ALPHA) ** 2 * mean_var
+                     + EWMA_ALPHA ** 2 * pooled_var / np.maximum(batch_count, 1))
+
+    warmup = new_batches <= MIN_BATCHES
+    for key, pooled, ewma in (("mean", pooled_mean, ewma_mean),
+                              ("var", pooled_var, pooled_var),
+                              ("mean_var", pooled_mean_var, ewma_mean_var)):
+        updated = np.where(warmup, pooled, ewma)
+        state[key] = np.where(seen, updated, state[key]).astype(np.float32)
+    state["count"] = new_count
+    state["batches"] = new_batches
+    state["total"] = new_total
+    state["sumsq"] = new_sumsq
+
+    return shifts, anomalies
+
+
+def delay_insights(airlines, count, total):
+    """Summarises per-cell flight counts and delay totals for the report."""
+    if count.sum() == 0:
+        return None
+
+    airline_count = count.sum(axis=1)
+    airline_avg = total.sum(axis=1) / np.maximum(airline_count, 1)
+    active_airlines = np.nonzero(airline_count)[0]
+    hour_count = count.sum(axis=0)
+    hour_avg = total.sum(axis=0) / np.maximum(hour_count, 1)
+    active_hours = np.nonzero(hour_count)[0]
+
+    evening = hour_count[17:].sum()
+    earlier = hour_count[:17].sum()
+    cell_avg = np.where(count > 0, total / np.maximum(count, 1), -np.inf)
+    worst = active_airlines[np.argmax(airline_avg[active_airlines])]
+    best = active_airlines[np.argmin(airline_avg[active_airlines])]
+
+    return {
+        "airline_avg": {airlines[i]: round(float(airline_avg[i]), 1)
+                        for i in active_airlines},
+        "worst_airline": airlines[worst],
+        "best_airline": airlines[best],
+        "peak_hour": int(active_hours[np.argmax(hour_avg[active_hours])]),
+        "peak_hour_delay": round(float(hour_avg[active_hours].max()), 1),
+        "quiet_hour": int(active_hours[np.argmin(hour_avg[active_hours])]),
+        "quiet_hour_delay": round(float(hour_avg[active_hours].min()), 1),
+        "evening_avg": round(float(total[:, 17:].sum() / max(evening, 1)), 1),
+        "earlier_avg": round(float(total[:, :17].sum() / max(earlier, 1)), 1),
+        "airline_peak_hour": {airlines[i]: int(cell_avg[i].argmax())
+                              for i in active_airlines},
+    }
+
+
+def top_alerts(alerts, messages):
+    """Adds the largest alerts by |z| to the report."""
+    alerts = alerts.sort_values("ZScore", key=abs, ascending=False)
+    if len(alerts) > MAX_ALERTS:
+        messages.append(
+            f"<p>Showing the {MAX_ALERTS} largest of {len(alerts)} by |z|.</p>")
+    add_table(alerts.head(MAX_ALERTS), messages, index=False)
+
+
+def detect_delay_anomalies(df, messages, state=None):
+    messages.append("<h2>Detecting Delay Anomalies...</h2>")
+
+    persist = state is None
+    if persist:
+        state = load_delay_state()
+
+    # Replay the input one departure day at a time so that even a single
+    # run builds a baseline and scores later days against earlier ones.
+    # Days already folded into a saved state are skipped.
+    last_date = state["last_date"]
+    day_shifts, day_anomalies = [], []
+    skipped = 0
+    for date, batch in df.groupby("DepartureDate", sort=True):
+        if date <= last_date:
+            skipped += batch.shape[0]
+            continue
+        shifts, anomalies = update_delay_state(state, batch)
+        shifts.insert(0, "DepartureDate", date)
+        day_shifts.append(shifts)
+        day_anomalies.append(anomalies)
+        state["last_date"] = date
+
+    if day_shifts:
+        shifts = pd.concat(day_shifts, ignore_index=True)
+        anomalies = pd.concat(day_anomalies, ignore_index=True)
+    else:
+        shifts = pd.DataFrame(columns=SHIFT_COLUMNS)
+        anomalies = pd.DataFrame(columns=ANOMALY_COLUMNS)
+    if persist:
+        save_delay_state(state)
+
+    messages.append(
+        f"<p>Scored {df.shape[0] - skipped} flights over {len(day_shifts)} "
+        f"departure days against EWMA baselines for "
+        f"{len(state['airlines'])} airlines (alerts at |z| &ge; {Z_THRESHOLD}).</p>")
+    if skipped:
+        messages.append(
+            f"<p>Skipped {skipped} flights departing on or before "
+            f"{last_date}, which are already in the saved baselines.</p>")
+    if shifts.empty:
+        messages.append(
+            "<p>No significant delay shifts detected in this batch.</p>")
+    else:
+        messages.append("<h3>Delay Shifts by Airline and Departure Hour:</h3>")
+        top_alerts(shifts, messages)
+    if not anomalies.empty:
+        messages.append("<h3>Anomalous Flights:</h3>")
+        top_alerts(anomalies, messages)
+    messages.append("<br/><hr>")
+    return state, shifts
+
+
 def insert_data(df, messages):
     messages.append("<h2>Inserting Data into MySQL...</h2>")
 
@@ -214,7 +610,112 @@ def insert_data(df, messages):
     return df_fetched
 
 
-def generate_report(messages):
+# Renders lazily loaded tables in compact mode
+LAZY_TABLE_SCRIPT = """
+    <script>
+    document.querySelectorAll("details.lazy-table").forEach(function (section) {
+        section.addEventListener("toggle", function () {
+            if (!section.open || section.dataset.loaded) return;
+            var data = JSON.parse(
+                document.getElementById(section.dataset.source).textContent);
+            var table = document.createElement("table");
+            var header = table.insertRow();
+            data.columns.forEach(function (column) {
+                var cell = document.createElement("th");
+                cell.textContent = column;
+                header.appendChild(cell);
+            });
+            data.data.forEach(function (values) {
+                var row = table.insertRow();
+                values.forEach(function (value) {
+                    row.insertCell().textContent = value === null ? "" : value;
+                });
+            });
+            section.appendChild(table);
+            section.dataset.loaded = "1";
+        });
+    });
+    </script>
+"""
+
+
+def add_table(df, messages, index=True):
+    """Adds a table to the report, as HTML or as lazily rendered JSON."""
+    if REPORT_MODE != "compact":
+        messages.append(df.to_html(index=index))
+        return
+
+    if index:
+        df = df.reset_index()
+    if df.shape[0] > TABLE_ROW_LIMIT:
+        messages.append(
+            f"<p>Showing the first {TABLE_ROW_LIMIT} of {df.shape[0]} rows.</p>")
+        df = df.head(TABLE_ROW_LIMIT)
+    source = f"table-{len(messages)}"
+    data = df.to_json(orient="split", index=False, date_format="iso")
+    data = data.replace("</", "<\\/")
+    messages.append(
+        f"<details class='lazy-table' data-source='{source}'>"
+        f"<summary>Show table ({df.shape[0]} rows)</summary></details>"
+        f"<script type='application/json' id='{source}'>"
+        f"{data}</script>"
+    )
+
+
+def save_figure(name, title, messages, raster=False):
+    """Saves the current figure and adds it to the report.
+
+    In compact mode the figure is kept open and only rendered by
+    generate_report, so the DPI can be lowered to meet the size budget.
+    """
+    if REPORT_MODE != "compact":
+        plt.savefig(f"reports/{name}.png", dpi=FIGURE_DPI)
+        plt.close()
+        messages.append(
+            f"<p>Saved plot: <a href='{name}.png' target='_blank'>{title}</a></p><br/> <img src='{name}.png'>"
+        )
+        return
+
+    messages.append(("figure", plt.gcf(), title, raster))
+
+
+def embedded_format(raster):
+    """Returns the format a figure is embedded in for FIGURE_FORMAT."""
+    if FIGURE_FORMAT == "auto":
+        return "webp" if raster else "svg"
+    return FIGURE_FORMAT
+
+
+def render_figure(figure, title, raster, dpi, id_prefix):
+    """Embeds a figure kept open by save_figure in the report."""
+    image_format = embedded_format(raster)
+
+    buffer = io.BytesIO()
+    with plt.rc_context({"svg.fonttype": "none"}):
+        figure.savefig(buffer, format=image_format, dpi=dpi)
+
+    if image_format == "svg":
+        svg = buffer.getvalue().decode("utf-8")
+        # Prefix the ids (and references to them) so that several inline
+        # SVGs do not repeat ids such as "figure_1" in the same page
+        image = re.sub(r'(\bid="|url\(#|href="#)', rf"\1{id_prefix}",
+                       svg[svg.find("<svg"):])
+    else:
+        encoded = base64.b64encode(buffer.getvalue()).decode("ascii")
+        image = f"<img src='data:image/{image_format};base64,{encoded}' alt='{title}'>"
+    return f"<h3>{title}</h3><div class='figure'>{image}</div>"
+
+
+def render_messages(messages, dpi):
+    """Joins the report messages, rendering any pending figures."""
+    return "".join(
+        render_figure(*message[1:], dpi, f"fig{i}-")
+        if isinstance(message, tuple) else message
+        for i, message in enumerate(messages)
+    )
+
+
+def generate_report(messages, path=REPORT_PATH):
     # Start HTML content
     html_content = """
     <!DOCTYPE html>
@@ -267,7 +768,7 @@ def generate_report(messages):
             text-decoration: underline;
             color: #1A5276;
         }
-        img {
+        img, .figure svg {
             max-width: 100%;
             height: auto;
             display: block;
@@ -280,9 +781,29 @@ def generate_report(messages):
         <h1>Aviation Data Report</h1>
     """
 
-    # Add all messages
-    for message in messages:
-        html_content += message
+    # Add all messages. If the compact report is over its size budget and
+    # has raster content (WebP/PNG figures or rasterized SVG layers), step
+    # the figure DPI down until it fits; vector figures, tables and text do
+    # not shrink with the DPI.
+    figures = [message for message in messages if isinstance(message, tuple)]
+    has_raster = any(raster or embedded_format(raster) != "svg"
+                     for _, _, _, raster in figures)
+    dpi = FIGURE_DPI
+    body = render_messages(messages, dpi)
+    while (REPORT_MODE == "compact" and has_raster
+           and len(body.encode("utf-8")) / 1024 > REPORT_SIZE_BUDGET_KB
+           and dpi > MIN_FIGURE_DPI):
+        dpi = max(int(dpi * 0.75), MIN_FIGURE_DPI)
+        print(f"Report exceeds the size budget of {REPORT_SIZE_BUDGET_KB} KB. "
+              f"Re-rendering figures at {dpi} DPI.")
+        body = render_messages(messages, dpi)
+
+    for _, figure, _, _ in figures:
+        plt.close(figure)
+
+    html_content += body
+    if REPORT_MODE == "compact":
+        html_content += LAZY_TABLE_SCRIPT
 
     # Close HTML content
     html_content += """
@@ -291,22 +812,31 @@ def generate_report(messages):
     """
 
     # Write to HTML file
-    if not os.path.exists("reports"):
-        os.makedirs("reports")
+    report_dir = os.path.dirname(path)
+    if report_dir and not os.path.exists(report_dir):
+        os.makedirs(report_dir)
 
-    with open("reports/aviation_report.html", "w") as report_file:
+    with open(path, "w") as report_file:
         report_file.write(html_content)
 
-    print("HTML report generated and saved as 'reports/aviation_report.html'.")
+    size_kb = os.path.getsize(path) / 1024
+    print(f"HTML report generated and saved as '{path}' ({size_kb:.1f} KB).")
+    if REPORT_MODE == "compact" and size_kb > REPORT_SIZE_BUDGET_KB:
+        print(f"Warning: report still exceeds the size budget of "
+              f"{REPORT_SIZE_BUDGET_KB} KB at {dpi} DPI. Lower "
+              f"TABLE_ROW_LIMIT or raise REPORT_SIZE_BUDGET_KB.")
+    return size_kb
 
 
 def data_analysis(df, messages):
     messages.append("<h2>Performing Data Analysis...</h2>")
+    airlines = list(pd.unique(df["Airline"]))
+    insights = delay_insights(airlines, *delay_totals(df, airlines))
 
     # Summary statistics of DelayMinutes
     delay_summary = df["DelayMinutes"].describe()
     messages.append("<h3>Delay Minutes Summary:</h3>")
-    messages.append(delay_summary.to_frame().to_html())
+    add_table(delay_summary.to_frame(), messages)
     messages.append("<br/><hr>")
 
     # Plot distribution of delays
@@ -316,26 +846,24 @@ def data_analysis(df, messages):
     plt.xlabel("Delay Minutes")
     plt.ylabel("Frequency")
     plt.tight_layout()
-
-    plt.savefig("reports/delay_distribution.png")
-    plt.close()
     messages.append("<center><h2>Plots:</h2></center>")
-    messages.append(
-        "<p>Saved plot: <a href='delay_distribution.png' target='_blank'>Distribution of Flight Delays</a></p><br/> <img src='delay_distribution.png'>"
-    )
+    save_figure("delay_distribution", "Distribution of Flight Delays", messages)
+    delays = df["DelayMinutes"]
+    skew = "right-skewed" if delays.skew() > 0 else "left-skewed or symmetric"
     messages.append("<h2>Insights:</h2>")
     messages.append(
-        "<p>1. The distribution shows that the majority of flights had delays between 0 and 10 minutes, with the highest frequency in this range.</p>")
-    messages.append("<p>2. The overall shape of the histogram suggests a right-skewed distribution. Most delays are concentrated at the lower end, with fewer flights experiencing significant delays (over 30 minutes).</p>")
+        f"<p>1. {(delays <= 10).mean():.0%} of flights had delays between 0 and 10 minutes (median delay: {delays.median():.1f} minutes).</p>")
     messages.append(
-        "<p>3. A significant proportion of flights face relatively short delays (below 15 minutes).</p>")
+        f"<p>2. The distribution is {skew}, with {(delays > 30).mean():.0%} of flights experiencing significant delays (over 30 minutes).</p>")
+    messages.append(
+        f"<p>3. {(delays < 15).mean():.0%} of flights face relatively short delays (below 15 minutes).</p>")
     messages.append("<br/><hr>")
 
     # Average delay per airline
     average_delay_airline = df.groupby(
         "Airline")["DelayMinutes"].mean().reset_index()
     messages.append("<h2>Average Delay per Airline:</h2>")
-    messages.append(average_delay_airline.to_html(index=False))
+    add_table(average_delay_airline, messages, index=False)
 
     # Plot average delay per airline
     plt.figure(figsize=(8, 5))
@@ -350,16 +878,15 @@ def data_analysis(df, messages):
     plt.xlabel("Airline")
     plt.ylabel("Average Delay (Minutes)")
     plt.tight_layout()
-    plt.savefig("reports/average_delay_airline.png")
-    plt.close()
-    messages.append(
-        "<p>Saved plot: <a href='average_delay_airline.png' target='_blank'>Average Delay by Airline</a></p><br/><img src='average_delay_airline.png'>"
-    )
+    save_figure("average_delay_airline", "Average Delay by Airline", messages)
+    worst = insights["worst_airline"]
+    best = insights["best_airline"]
+    airline_avg = insights["airline_avg"]
     messages.append("<h2>Insights:</h2>")
     messages.append(
-        "<p>1. The average delay times vary significantly across different airlines.</p>")
+        f"<p>1. Average delay times range from {airline_avg[best]} to {airline_avg[worst]} minutes across airlines.</p>")
     messages.append(
-        "<p>2. American Airlines has the highest average delay, while Delta Airline has the lowest average delay.</p>")
+        f"<p>2. {worst} has the highest average delay, while {best} has the lowest average delay.</p>")
     messages.append(
         "<p>3. The difference in average delay times suggests variations in operational efficiency and performance among airlines.</p>")
     messages.append("<br/><hr>")
@@ -371,7 +898,8 @@ def data_analysis(df, messages):
     # Scatter plot of DepartureHour vs DelayMinutes
     plt.figure(figsize=(8, 5))
     sns.scatterplot(
-        data=df, x="DepartureHour", y="DelayMinutes", hue="Airline", alpha=0.6
+        data=df, x="DepartureHour", y="DelayMinutes", hue="Airline", alpha=0.6,
+        rasterized=True
     )
     plt.title("Flight Delays vs Departure Time")
     plt.xlabel("Departure Hour")
@@ -379,18 +907,15 @@ def data_analysis(df, messages):
     plt.legend(title="Airline", bbox_to_anchor=(1.05, 1), loc="upper left")
     plt.grid(axis="y", linestyle="--")
     plt.tight_layout()
-    plt.savefig("reports/departure_vs_delay.png")
-    plt.close()
-    messages.append(
-        "<p>Saved plot: <a href='departure_vs_delay.png' target='_blank'>Flight Delays vs Departure Time</a></p> <br/><img src='departure_vs_delay.png'>"
-    )
+    save_figure("departure_vs_delay", "Flight Delays vs Departure Time",
+                messages, raster=True)
     messages.append("<h2>Insights:</h2>")
     messages.append(
-        "<p>1. Evening Delays: Delays increase significantly after 16:00, especially for United and American Airlines.</p>")
+        f"<p>1. Evening Delays: Flights departing from 17:00 average {insights['evening_avg']} minutes of delay, compared to {insights['earlier_avg']} minutes earlier in the day.</p>")
     messages.append(
-        "<p>2. Delta's Punctuality: Delta consistently has minimal delays.</p>")
+        f"<p>2. {best}'s Punctuality: {best} has the lowest average delay at {airline_avg[best]} minutes.</p>")
     messages.append(
-        "<p>3. American Airlines Peaks: American Airlines faces large delays around morning 8:00 and night 20:00.</p>")
+        f"<p>3. {worst} Peaks: {worst} faces its largest delays around {insights['airline_peak_hour'][worst]}:00.</p>")
     messages.append("<br/><hr>")
 
     # Analyze average delay by departure hour
@@ -408,18 +933,13 @@ def data_analysis(df, messages):
     plt.xticks(range(6, 24))
     plt.grid(axis="y", linestyle="--")
     plt.tight_layout()
-    plt.savefig("reports/average_delay_hour.png")
-    plt.close()
-    messages.append(
-        "<p>Saved plot: <a href='average_delay_hour.png' target='_blank'>Average Delay by Departure Hour</a></p> <br/><img src='average_delay_hour.png'>"
-    )
+    save_figure("average_delay_hour", "Average Delay by Departure Hour",
+                messages)
     messages.append("<h2>Insights:</h2>")
     messages.append(
-        "<p> 1. High delays in the evening: Delays peak after 17:00, with the highest around 20:00 (60+ minutes).</p>")
-    messages.append(
-        "<p>2. Minimal delays at midday: Almost no delays between 14:00 and 15:00.</p>")
+        f"<p>1. Peak delays: Delays are highest around {insights['peak_hour']}:00 ({insights['peak_hour_delay']} minutes on average).</p>")
     messages.append(
-        "<p>3. Morning decline: Delays gradually decrease from 9:00 to 13:00.</p>")
+        f"<p>2. Minimal delays: Flights around {insights['quiet_hour']}:00 see the least delays ({insights['quiet_hour_delay']} minutes on average).</p>")
     messages.append("<br/><hr>")
 
     # Perform one-way ANOVA
@@ -441,45 +961,78 @@ def data_analysis(df, messages):
     messages.append("<h3>Interpretation:</h3>")
     messages.append(interpretation)
     messages.append("<br/><hr>")
-    # return delay_summary, average_delay_airline
+    return anova_result
 
 
-def key_stats(messages):
+def key_stats(state, shifts, anova_result, messages):
+    insights = delay_insights(state["airlines"], state["count"], state["total"])
     messages.append("<h2>Key Insights:</h2>")
+    if insights is None:
+        messages.append("<p>No flights have been processed yet.</p>")
+        return
+    if DELAY_STATE_PATH:
+        messages.append(
+            "<p><em>Figures below are all-time, covering every flight processed so far including previous runs.</em></p>")
+
+    worst = insights["worst_airline"]
+    best = insights["best_airline"]
+    airline_avg = insights["airline_avg"]
+    peak_hour = insights["peak_hour"]
+
     messages.append("<h3>a. Summary of Key Findings:</h3>")
-    messages.append("<p><strong>Delay Distribution:</strong> Most flights experience delays of less than 30 minutes, with a significant portion facing delays under 10 minutes.</p>")
-    messages.append("<p><strong>Average Delay by Airline:</strong> American Airlines shows the highest average delay, followed by United Airlines, while Delta experiences the lowest delays.</p>")
     messages.append(
-        "<p><strong>Impact of Departure Time:</strong> Flights departing later in the day tend to experience longer delays, particularly during the evening.</p>")
-    messages.append("<p><strong>No Significant Differences Across Airlines:</strong> ANOVA results indicate no statistically significant difference in delays between airlines (p-value: 0.225).</p>")
+        f"<p><strong>Average Delay by Airline:</strong> {worst} shows the highest average delay, while {best} experiences the lowest delays.</p>")
+    if insights["evening_avg"] > insights["earlier_avg"]:
+        messages.append(
+            "<p><strong>Impact of Departure Time:</strong> Flights departing later in the day tend to experience longer delays, particularly during the evening.</p>")
+    else:
+        messages.append(
+            "<p><strong>Impact of Departure Time:</strong> Evening departures do not experience longer delays than earlier flights.</p>")
+    if anova_result.pvalue < 0.05:
+        messages.append(
+            f"<p><strong>Significant Differences Across Airlines:</strong> ANOVA results indicate a statistically significant difference in delays between airlines (p-value: {anova_result.pvalue:.3f}).</p>")
+    else:
+        messages.append(
+            f"<p><strong>No Significant Differences Across Airlines:</strong> ANOVA results indicate no statistically significant difference in delays between airlines (p-value: {anova_result.pvalue:.3f}).</p>")
     messages.append("<br/><hr>")
 
     messages.append("<h3>b. Impact of Departure Times on Delays:</h3>")
     messages.append(
-        "<p><strong>Evening Delays:</strong> Delays peak in the evening, especially after 17:00, with the highest around 20:00.</p>")
+        f"<p><strong>Peak Delays:</strong> Delays are highest around {peak_hour}:00, averaging {insights['peak_hour_delay']} minutes.</p>")
     messages.append(
-        "<p><strong>Minimal Delays at Midday:</strong> Flights between 14:00 and 15:00 see the least delays.</p>")
+        f"<p><strong>Minimal Delays:</strong> Flights around {insights['quiet_hour']}:00 see the least delays.</p>")
     messages.append(
-        "<p><strong>Morning Decline:</strong> Delays gradually reduce from 9:00 AM until early afternoon.</p>")
+        f"<p><strong>Evening vs Earlier:</strong> Flights departing from 17:00 average {insights['evening_avg']} minutes of delay, compared to {insights['earlier_avg']} minutes earlier in the day.</p>")
     messages.append("<br/><hr>")
 
     messages.append(
         "<h3>c. Comparison of Delay Distributions Between Airlines:</h3>")
-    messages.append(
-        "<p><strong>American Airlines:</strong> Faces the most significant delays, with an average of 30 minutes.</p>")
-    messages.append(
-        "<p><strong>Delta Airlines:</strong> Demonstrates operational efficiency with the lowest average delays at 5 minutes.</p>")
-    messages.append(
-        "<p><strong>United Airlines:</strong> Falls in the middle, averaging 22.5 minutes of delay.</p>")
+    for airline, average in sorted(
+            airline_avg.items(), key=lambda item: item[1], reverse=True):
+        messages.append(
+            f"<p><strong>{airline}:</strong> Averages {average} minutes of delay, peaking around {insights['airline_peak_hour'][airline]}:00.</p>")
+    messages.append("<br/><hr>")
+
+    messages.append("<h3>d. Detected Delay Shifts:</h3>")
+    rising = shifts[shifts["ZScore"] > 0]
+    if shifts.empty:
+        messages.append(
+            "<p>No airline and departure hour deviated significantly from its baseline in this batch.</p>")
+    else:
+        messages.append(
+            f"<p>{len(shifts)} airline and departure hour slots shifted from their baseline ({len(rising)} up, {len(shifts) - len(rising)} down). The largest are listed under Detecting Delay Anomalies.</p>")
     messages.append("<br/><hr>")
 
-    messages.append("<h3>d. Recommendations:</h3>")
-    messages.append("<p><strong>Operational Optimization:</strong> American Airlines should focus on reducing delays, especially during high-delay periods (early morning and evening).</p>")
-    messages.append("<p><strong>Resource Allocation:</strong> Airlines should allocate more resources during peak delay times (late afternoon and evening) to improve punctuality.</p>")
+    messages.append("<h3>e. Recommendations:</h3>")
     messages.append(
-        "<p><strong>Scheduling Adjustments:</strong> Revising flight schedules around high-delay times (17:00-20:00) could help reduce bottlenecks.</p>")
+        f"<p><strong>Operational Optimization:</strong> {worst} should focus on reducing delays, especially around {insights['airline_peak_hour'][worst]}:00.</p>")
+    messages.append(
+        f"<p><strong>Resource Allocation:</strong> Airlines should allocate more resources around {peak_hour}:00 to improve punctuality.</p>")
+    if not rising.empty:
+        messages.append(
+            f"<p><strong>Emerging Bottlenecks:</strong> Investigate the {len(rising)} airline and departure hour slots with rising delays.</p>")
     messages.append("<br/><hr>")
-    messages.append("<h3>e. Conclusion:</h3>")
+    messages.append("<h3>f. Conclusion:</h3>")
     messages.append(
         "<p>The analysis provides valuable insights into flight delays, highlighting the impact of departure times and variations across airlines. By understanding these patterns, airlines can optimize operations and improve overall efficiency.</p>"
     )
@@ -496,11 +1049,11 @@ def main():
 
     # Read data from CSV
     messages.append("<h2>Reading Data...</h2>")
-    df = read_data_csv()
+    df = read_data_csv(messages=messages)
     messages.append(
         f"<p> Loaded dataset with {df.shape[0]} records and {df.shape[1]} columns. </p>")
     messages.append("<h3>Sample Data:</h3>")
-    messages.append(df.head().to_html())
+    add_table(df.head(), messages)
     messages.append("<br/><hr>")
     # Insert data into MySQL and fetch back
     df = insert_data(df, messages)
@@ -521,14 +1074,17 @@ def main():
     #     "<p>Normalized data saved as <a href='datasets/normalized_data.csv' target='_blank'>normalized_data.csv</a>.</p>"
     # )
     messages.append("<br/><hr>")
+    # Score the batch and update the per airline / departure hour baselines
+    state, shifts = detect_delay_anomalies(df_normalized, messages)
+
     # Perform data analysis
-    data_analysis(df_normalized, messages)
+    anova_result = data_analysis(df_normalized, messages)
 
     # Save cleaned data to CSV
     df.to_csv("datasets/aviation_data_cleaned.csv", index=False)
 
     # Key Insights
-    key_stats(messages)
+    key_stats(state, shifts, anova_result, messages)
 
     # Generate report
     generate_report(messages)